@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .connections import check_connection_health
+        request_started.connect(check_connection_health)
+        from .shopping_list import register_fonts
+        register_fonts()
@@ -0,0 +1,9 @@
+from django.urls import include, path
+
+from . import urls
+from .async_views import async_patterns
+
+urlpatterns = [
+    path('', include(async_patterns(urls.router_api_v1.urls))),
+    *urls.urlpatterns,
+]
@@ -0,0 +1,58 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+ASYNC_ROUTES = (
+    'tags-list',
+    'tags-detail',
+    'ingredients-list',
+    'ingredients-detail',
+    'recipes-list',
+    'recipes-detail',
+    'recipes-download-shopping-cart',
+)
+
+
+def run_in_worker(func):
+    # Worker threads keep their own connections, which the request
+    # signals never see, so they are recycled around every call.
+    @wraps(func)
+    def worker(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(worker, thread_sensitive=False)
+
+
+def async_view(view):
+    """
+    Serve a DRF view from a thread pool instead of the single
+    thread-sensitive executor ASGI uses for sync views.
+    """
+    def handle(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.streaming:
+            # ASGIHandler iterates streaming bodies on the event loop, so
+            # generated files such as the shopping list PDF are built here.
+            response.streaming_content = [
+                b''.join(response.streaming_content)]
+        return response
+
+    handle = run_in_worker(handle)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await handle(request, *args, **kwargs)
+    return wrapper
+
+
+def async_patterns(patterns, names=ASYNC_ROUTES):
+    return [URLPattern(pattern.pattern, async_view(pattern.callback),
+                       pattern.default_args, pattern.name)
+            for pattern in patterns if pattern.name in names]
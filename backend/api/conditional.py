@@ -0,0 +1,77 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+VERSION_KEY = 'version:{}'
+
+
+def set_versions(scopes):
+    version = time.time_ns()
+    cache.set_many(
+        {VERSION_KEY.format(scope): version for scope in scopes}, None)
+
+
+def bump_version(*scopes):
+    # A bump before commit would let a concurrent request cache the old
+    # rows under the new version, so it waits for the transaction.
+    transaction.on_commit(lambda: set_versions(scopes))
+
+
+def get_versions(*scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        version = time.time_ns()
+        for key in missing:
+            if cache.add(key, version, None):
+                versions[key] = version
+            else:
+                versions[key] = cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+class ConditionalGetMixin:
+    conditional_actions = ('list', 'retrieve')
+    vary_on_user = False
+
+    def get_version_scopes(self):
+        raise NotImplementedError
+
+    def get_etag_and_last_modified(self):
+        scopes = self.get_version_scopes()
+        versions = get_versions(*scopes)
+        etag = '-'.join(str(version) for version in versions)
+        if self.vary_on_user:
+            etag = f'{etag}-{self.request.user.id}'
+        etag = hashlib.md5(etag.encode()).hexdigest()
+        return quote_etag(etag), max(versions) // 10 ** 9
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_etag_and_last_modified()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            if self.vary_on_user:
+                patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(
+            request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            request, super().retrieve, *args, **kwargs)
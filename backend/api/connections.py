@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+
+POOL_ENGINE = 'backend.postgresql_pool'
+
+
+def check_connection_health(**kwargs):
+    # CONN_HEALTH_CHECKS is only built in from Django 4.1, so persistent
+    # connections are verified here before a request reuses them.
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not connection.is_usable()):
+            connection.close()
+
+
+@register(Tags.database)
+def check_database_connections(app_configs=None, databases=None, **kwargs):
+    errors = []
+    for alias, settings_dict in settings.DATABASES.items():
+        if settings_dict['ENGINE'] != POOL_ENGINE:
+            continue
+        pool = settings_dict.get('POOL', {})
+        if pool.get('MIN_SIZE', 1) > pool.get('MAX_SIZE', 10):
+            errors.append(Error(
+                f'DB_POOL_MIN_SIZE exceeds DB_POOL_MAX_SIZE for {alias}.',
+                id='api.E001'))
+        if settings_dict.get('CONN_MAX_AGE'):
+            errors.append(Warning(
+                f'CONN_MAX_AGE keeps pooled connections of {alias} out of '
+                f'the pool between requests.',
+                hint='Set DB_CONN_MAX_AGE=0 with the pooled backend.',
+                id='api.W001'))
+    for alias in databases or ():
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError as error:
+            errors.append(Error(
+                f'Could not connect to database {alias}: {error}',
+                id='api.E002'))
+        finally:
+            connections[alias].close()
+    return errors
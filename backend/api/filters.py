@@ -1,14 +1,35 @@
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django_filters import CharFilter, FilterSet
 from django_filters import rest_framework as filters
 from django_filters.widgets import BooleanWidget
 from recipes.models import Ingredient, Recipe, Tag
+from recipes.search import search_recipes
+
+from .conditional import get_versions
+
+TAG_MATCH_CHOICES = (('any', 'any'), ('all', 'all'))
+
+
+def get_tag_ids_by_slug():
+    version, = get_versions('tags')
+    return cache.get_or_set(
+        f'tag_slugs:{version}',
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        None)
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids_by_slug()]
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags')
+    tags_match = filters.ChoiceFilter(
+        choices=TAG_MATCH_CHOICES,
+        method='filter_tags_match')
     author = filters.CharFilter(field_name='author__id')
     is_favorited = filters.BooleanFilter(
         widget=BooleanWidget(),
@@ -16,10 +37,36 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         widget=BooleanWidget(),
         method='filter_shopping_cart')
+    search = filters.CharFilter(method='filter_search')
+    max_ingredients = filters.NumberFilter(
+        field_name='summary__ingredients_count', lookup_expr='lte')
+    min_mass = filters.NumberFilter(
+        field_name='summary__total_mass', lookup_expr='gte')
+    max_mass = filters.NumberFilter(
+        field_name='summary__total_mass', lookup_expr='lte')
+    max_cost = filters.NumberFilter(
+        field_name='summary__cost', lookup_expr='lte')
 
     class Meta():
         model = Recipe
-        fields = ['tags', 'author', 'is_favorited', 'is_in_shopping_cart']
+        fields = ['tags', 'tags_match', 'author', 'is_favorited',
+                  'is_in_shopping_cart', 'search', 'max_ingredients',
+                  'min_mass', 'max_mass', 'max_cost']
+
+    def filter_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids_by_slug()
+        tag_ids = [tag_ids[slug] for slug in value if slug in tag_ids]
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'))
+        if self.form.cleaned_data.get('tags_match') == 'all':
+            for tag_id in tag_ids:
+                queryset = queryset.filter(
+                    Exists(recipe_tags.filter(tag_id=tag_id)))
+            return queryset
+        return queryset.filter(Exists(recipe_tags.filter(tag_id__in=tag_ids)))
+
+    def filter_tags_match(self, queryset, name, value):
+        return queryset
 
     def filter_by_field(self, queryset, value, field):
         user = self.request.user
@@ -36,6 +83,9 @@ class RecipeFilter(FilterSet):
     def filter_shopping_cart(self, queryset, name, value):
         return self.filter_by_field(queryset, value, 'shopping_cart')
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
 
 class IngredientFilter(FilterSet):
     name = CharFilter(
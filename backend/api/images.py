@@ -0,0 +1,147 @@
+import base64
+import binascii
+import io
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from drf_extra_fields.fields import Base64FieldMixin, Base64ImageField
+from PIL import Image, ImageOps, UnidentifiedImageError
+from recipes.models import Recipe
+from rest_framework.exceptions import ValidationError
+
+from .conditional import bump_version
+
+DECODE_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+VARIANTS_DIR = 'variants'
+IMAGE_VARIANTS = {
+    'card': {'size': (600, 400), 'crop': True, 'format': 'JPEG'},
+    'detail': {'size': (1200, 1200), 'crop': False, 'format': 'JPEG'},
+    'webp': {'size': (1200, 1200), 'crop': False, 'format': 'WEBP'},
+}
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+    thread_name_prefix='recipe-images')
+
+
+def get_variant_name(name, variant):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    extension = EXTENSIONS[IMAGE_VARIANTS[variant]['format']]
+    return os.path.join(
+        directory, VARIANTS_DIR, f'{stem}_{variant}.{extension}')
+
+
+def render_variant(image, variant):
+    spec = IMAGE_VARIANTS[variant]
+    if spec['crop']:
+        image = ImageOps.fit(image, spec['size'], Image.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail(spec['size'], Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, spec['format'], quality=85)
+    return buffer.getvalue()
+
+
+def generate_variants(recipe_id, name):
+    try:
+        with default_storage.open(name) as file:
+            image = Image.open(file)
+            image = ImageOps.exif_transpose(image).convert('RGB')
+        for variant in IMAGE_VARIANTS:
+            variant_name = get_variant_name(name, variant)
+            if default_storage.exists(variant_name):
+                default_storage.delete(variant_name)
+            default_storage.save(
+                variant_name, ContentFile(render_variant(image, variant)))
+        if Recipe.objects.filter(pk=recipe_id, image=name).update(
+                image_processed=True):
+            bump_version(f'recipe:{recipe_id}', 'recipes')
+    except Exception:
+        # Nothing reads the executor's futures, so failures are logged here.
+        logger.exception(
+            'Could not generate image variants for recipe %s from %s.',
+            recipe_id, name)
+    finally:
+        connection.close()
+
+
+def schedule_variants(recipe):
+    recipe_id, name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: executor.submit(generate_variants, recipe_id, name))
+
+
+def decode_base64_chunks(data):
+    # Line-wrapped input has whitespace inside chunks, so every chunk is
+    # stripped and a partial 4-character quantum is carried into the next.
+    rest = ''
+    for start in range(0, len(data), DECODE_CHUNK_SIZE):
+        chunk = rest + ''.join(data[start:start + DECODE_CHUNK_SIZE].split())
+        end = len(chunk) - len(chunk) % 4
+        rest = chunk[end:]
+        yield base64.b64decode(chunk[:end])
+    if rest:
+        yield base64.b64decode(rest)
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    ALLOWED_TYPES = ('jpeg', 'png', 'gif', 'webp')
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        if ';base64,' in base64_data:
+            base64_data = base64_data.split(';base64,', 1)[1]
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            for chunk in decode_base64_chunks(base64_data):
+                file.write(chunk)
+            file.seek(0)
+            image_format = Image.open(file).format.lower()
+        except (binascii.Error, ValueError, UnidentifiedImageError):
+            file.close()
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        if image_format not in self.ALLOWED_TYPES:
+            file.close()
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        extension = 'jpg' if image_format == 'jpeg' else image_format
+        file.seek(0, os.SEEK_END)
+        data = UploadedFile(
+            file=file,
+            name=f'{uuid.uuid4()}.{extension}',
+            content_type=f'image/{image_format}',
+            size=file.tell())
+        file.seek(0)
+        return super(Base64FieldMixin, self).to_internal_value(data)
+
+
+class RecipeImageField(StreamingBase64ImageField):
+    def __init__(self, *args, variant=None, **kwargs):
+        self.variant = variant
+        super().__init__(*args, **kwargs)
+
+    def to_representation(self, file):
+        variant = self.variant or self.context.get('image_variant', 'detail')
+        if not file or not getattr(file.instance, 'image_processed', False):
+            return super().to_representation(file)
+        url = default_storage.url(get_variant_name(file.name, variant))
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
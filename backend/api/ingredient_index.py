@@ -0,0 +1,79 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from django.conf import settings
+from recipes.models import Ingredient
+
+from .conditional import get_versions
+
+SEARCH_LIMIT = 20
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._keys = None
+        self._items = None
+        self._version = None
+        self._checked_at = None
+        self._lock = Lock()
+
+    def invalidate(self):
+        self._keys = None
+
+    def build(self, version):
+        rows = sorted(
+            (name.casefold(), pk, name, unit)
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'))
+        items = [{'id': pk, 'name': name, 'measurement_unit': unit}
+                 for _, pk, name, unit in rows]
+        keys = [key for key, *_ in rows]
+        with self._lock:
+            self._items = items
+            self._keys = keys
+            self._version = version
+        return keys, items
+
+    def snapshot(self):
+        # The 'ingredients' version is shared through the cache, so edits
+        # and catalog loads made by other processes also trigger a rebuild.
+        # It is re-read at most every INGREDIENT_INDEX_CHECK_INTERVAL
+        # seconds to keep the cache off the autocomplete hot path.
+        now = time.monotonic()
+        with self._lock:
+            keys, items = self._keys, self._items
+            fresh = (self._checked_at is not None
+                     and now - self._checked_at
+                     < settings.INGREDIENT_INDEX_CHECK_INTERVAL)
+        if keys is not None and fresh:
+            return keys, items
+        version, = get_versions('ingredients')
+        with self._lock:
+            current = self._version == version
+            self._checked_at = now
+        if keys is None or not current:
+            keys, items = self.build(version)
+        return keys, items
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        keys, items = self.snapshot()
+        query = query.strip().casefold()
+        if not query:
+            return items[:limit]
+        result = []
+        position = bisect_left(keys, query)
+        while (position < len(keys) and len(result) < limit
+               and keys[position].startswith(query)):
+            result.append(items[position])
+            position += 1
+        if len(result) < limit:
+            for key, item in zip(keys, items):
+                if query in key and not key.startswith(query):
+                    result.append(item)
+                    if len(result) == limit:
+                        break
+        return result
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('latency', 'queries', 'db_time', 'serializer_time')
+PERCENTILES = (50, 95, 99)
+
+_local = threading.local()
+
+
+def percentile(values, rank):
+    values = sorted(values)
+    index = min(len(values) - 1, round(rank / 100 * (len(values) - 1)))
+    return values[index]
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[sql] += 1
+
+    def repeated_shapes(self, threshold):
+        return {sql: count for sql, count in self.shapes.items()
+                if count > threshold}
+
+
+class StatsRegistry:
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(
+            lambda: {metric: deque(maxlen=window) for metric in METRICS})
+        self.requests = Counter()
+        self.n_plus_one = defaultdict(Counter)
+
+    def record(self, endpoint, latency, stats, repeated):
+        with self.lock:
+            samples = self.samples[endpoint]
+            samples['latency'].append(latency * 1000)
+            samples['queries'].append(stats.queries)
+            samples['db_time'].append(stats.db_time * 1000)
+            samples['serializer_time'].append(stats.serializer_time * 1000)
+            self.requests[endpoint] += 1
+            self.n_plus_one[endpoint].update(repeated.keys())
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                endpoint: {
+                    'requests': self.requests[endpoint],
+                    **{metric: {f'p{rank}': round(percentile(values, rank), 3)
+                                for rank in PERCENTILES}
+                       for metric, values in samples.items()},
+                    'n_plus_one': [
+                        {'sql': sql, 'requests': count}
+                        for sql, count
+                        in self.n_plus_one[endpoint].most_common(10)],
+                }
+                for endpoint, samples in self.samples.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.requests.clear()
+            self.n_plus_one.clear()
+
+
+registry = StatsRegistry(getattr(settings, 'INSTRUMENTATION_WINDOW', 1000))
+
+
+def timed_data(prop):
+    @wraps(prop.fget)
+    def data(serializer):
+        stats = getattr(_local, 'stats', None)
+        if stats is None:
+            return prop.fget(serializer)
+        stats.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return prop.fget(serializer)
+        finally:
+            stats.serializer_depth -= 1
+            if not stats.serializer_depth:
+                stats.serializer_time += time.perf_counter() - started
+    return property(data)
+
+
+def instrument_serializers():
+    # Serializer time is measured around the top-level .data call,
+    # which is where DRF turns instances into primitives.
+    for serializer_class in (serializers.Serializer,
+                             serializers.ListSerializer):
+        if not getattr(serializer_class, '_instrumented', False):
+            serializer_class.data = timed_data(serializer_class.data)
+            serializer_class._instrumented = True
+
+
+def get_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return f'{request.method} {match.view_name or match._func_path}'
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(
+            settings, 'INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', 5)
+        instrument_serializers()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        _local.stats = stats
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _local.stats = None
+        latency = time.perf_counter() - started
+        endpoint = get_endpoint(request)
+        if endpoint is None:
+            return response
+        repeated = stats.repeated_shapes(self.threshold)
+        if repeated:
+            logger.warning(
+                'Possible N+1 in %s: %s', endpoint,
+                '; '.join(f'{count}x {sql[:200]}'
+                          for sql, count in repeated.items()))
+        registry.record(endpoint, latency, stats, repeated)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={stats.db_time * 1000:.1f};'
+            f'desc="{stats.queries} queries"',
+            f'serializer;dur={stats.serializer_time * 1000:.1f}',
+            f'total;dur={latency * 1000:.1f}',
+        ))
+        return response
@@ -0,0 +1,114 @@
+import json
+import os
+import statistics
+import time
+
+from api.instrumentation import RequestStats
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'bench_baseline.json')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the main API endpoints against a JSON baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed relative latency regression.')
+        parser.add_argument('--update', action='store_true',
+                            help='Write the results as the new baseline.')
+
+    def get_endpoints(self):
+        user = User.objects.annotate(
+            subscriptions_total=Count('subscriptions', distinct=True),
+            cart_total=Count('shopping_cart', distinct=True),
+        ).order_by('-subscriptions_total', '-cart_total').first()
+        recipe = Recipe.objects.order_by('-favorites_count').first()
+        tag = Tag.objects.first()
+        ingredient = Ingredient.objects.order_by('id').first()
+        if None in (user, recipe, tag, ingredient):
+            raise CommandError('No data to benchmark, run seed_bench first.')
+        return user, {
+            'recipe_list': '/api/recipes/?limit=6',
+            'recipe_list_filtered': (
+                f'/api/recipes/?limit=6&tags={tag.slug}'
+                f'&author={recipe.author_id}'),
+            'recipe_list_favorited': '/api/recipes/?limit=6&is_favorited=1',
+            'recipe_detail': f'/api/recipes/{recipe.id}/',
+            'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+            'shopping_cart_pdf': '/api/recipes/download_shopping_cart/',
+            'ingredient_search': (
+                f'/api/ingredients/?name={ingredient.name[:2]}'),
+        }
+
+    def measure(self, client, url, repeat):
+        cache.clear()
+        queries = RequestStats()
+        with connection.execute_wrapper(queries):
+            response = client.get(url)
+            b''.join(response) if response.streaming else response.content
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}.')
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            b''.join(response) if response.streaming else response.content
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'queries': queries.queries,
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[int(0.95 * (len(timings) - 1))], 3),
+        }
+
+    def compare(self, results, baseline, threshold):
+        regressions = []
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                continue
+            if result['queries'] > expected['queries']:
+                regressions.append(
+                    f"{name}: {result['queries']} queries, "
+                    f"baseline {expected['queries']}")
+            if result['median_ms'] > expected['median_ms'] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {result['median_ms']} ms, "
+                    f"baseline {expected['median_ms']} ms")
+        return regressions
+
+    def handle(self, *args, **options):
+        user, endpoints = self.get_endpoints()
+        token, _ = Token.objects.get_or_create(user=user)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        results = {}
+        for name, url in endpoints.items():
+            results[name] = self.measure(client, url, options['repeat'])
+            self.stdout.write(
+                f"{name:<24}{results[name]['queries']:>4} queries"
+                f"{results[name]['median_ms']:>10} ms"
+                f"{results[name]['p95_ms']:>10} ms p95")
+        if options['update'] or not os.path.exists(options['baseline']):
+            with open(options['baseline'], 'w') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(
+                f"Baseline written to {options['baseline']}."))
+            return
+        with open(options['baseline']) as file:
+            baseline = json.load(file)
+        regressions = self.compare(results, baseline, options['threshold'])
+        if regressions:
+            raise CommandError(
+                'Performance regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
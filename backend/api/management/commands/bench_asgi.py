@@ -0,0 +1,71 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from .bench import Command as BenchCommand
+
+
+def read(response, url):
+    if response.status_code != 200:
+        raise CommandError(f'{url} returned {response.status_code}.')
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Command(BenchCommand):
+    help = 'Compare WSGI and ASGI throughput under concurrent load.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def run_wsgi(self, url, total):
+        def fetch(_):
+            client = Client(HTTP_AUTHORIZATION=self.authorization)
+            try:
+                read(client.get(url), url)
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            list(pool.map(fetch, range(total)))
+
+    def run_asgi(self, url, total):
+        async def fetch(client, semaphore):
+            async with semaphore:
+                read(await client.get(
+                    url, authorization=self.authorization), url)
+
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(
+                *(fetch(client, semaphore) for _ in range(total)))
+
+        asyncio.run(run())
+
+    def throughput(self, run, url, total):
+        run(url, 1)
+        started = time.perf_counter()
+        run(url, total)
+        return round(total / (time.perf_counter() - started), 1)
+
+    def handle(self, *args, **options):
+        user, endpoints = self.get_endpoints()
+        token, _ = Token.objects.get_or_create(user=user)
+        self.authorization = f'Token {token.key}'
+        self.concurrency = options['concurrency']
+        total = options['requests']
+        self.stdout.write(
+            f"{'endpoint':<24}{'wsgi req/s':>12}{'asgi req/s':>12}")
+        for name, url in endpoints.items():
+            wsgi = self.throughput(self.run_wsgi, url, total)
+            with override_settings(ROOT_URLCONF='backend.asgi_urls'):
+                asgi = self.throughput(self.run_asgi, url, total)
+            self.stdout.write(f'{name:<24}{wsgi:>12}{asgi:>12}')
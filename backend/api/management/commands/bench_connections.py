@@ -0,0 +1,53 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request database connection overhead.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def request(self):
+        started = time.perf_counter()
+        request_started.send(sender=self.__class__)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        elapsed = time.perf_counter() - started
+        request_finished.send(sender=self.__class__)
+        return elapsed * 1000
+
+    def measure(self, repeat, **overrides):
+        original = {key: connection.settings_dict.get(key)
+                    for key in overrides}
+        connection.close()
+        connection.settings_dict.update(overrides)
+        try:
+            return statistics.median(
+                self.request() for _ in range(repeat))
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        modes = {
+            'new connection': {'CONN_MAX_AGE': 0},
+            'persistent': {'CONN_MAX_AGE': None,
+                           'CONN_HEALTH_CHECKS': False},
+            'persistent + checks': {'CONN_MAX_AGE': None,
+                                    'CONN_HEALTH_CHECKS': True},
+        }
+        self.stdout.write(
+            f"Engine: {connection.settings_dict['ENGINE']}")
+        baseline = None
+        for name, overrides in modes.items():
+            median = self.measure(repeat, **overrides)
+            baseline = baseline or median
+            self.stdout.write(
+                f'{name:<24}{median:>10.3f} ms'
+                f'{baseline - median:>10.3f} ms saved')
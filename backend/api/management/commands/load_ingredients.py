@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from api.conditional import bump_version
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipes.models import Ingredient
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(settings.BASE_DIR), 'data', 'ingredients.json')
+STAGING_TABLE = 'ingredient_import'
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item['name'], item['measurement_unit']
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row:
+            yield row[0], row[1]
+
+
+READERS = {
+    'json': read_json,
+    'csv': read_csv,
+}
+
+
+class Command(BaseCommand):
+    help = 'Load the ingredient catalog from a JSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+        parser.add_argument('--format', choices=READERS)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (options['format']
+                       or os.path.splitext(path)[1].lstrip('.').lower())
+        if file_format not in READERS:
+            raise CommandError(f'Unsupported file format: {file_format}')
+        started = time.perf_counter()
+        count_before = Ingredient.objects.count()
+        try:
+            with open(path, encoding='utf-8') as file, transaction.atomic():
+                rows = READERS[file_format](file)
+                if connection.vendor == 'postgresql':
+                    read = self.copy_rows(rows, options['batch_size'])
+                else:
+                    read = self.bulk_create_rows(rows, options['batch_size'])
+        except (OSError, ValueError, KeyError, IndexError) as error:
+            raise CommandError(f'Could not load {path}: {error}')
+        bump_version('ingredients')
+        created = Ingredient.objects.count() - count_before
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {read} rows, created {created} ingredients '
+            f'in {time.perf_counter() - started:.2f}s.'))
+
+    def batches(self, rows, batch_size):
+        rows = iter(rows)
+        batch = list(islice(rows, batch_size))
+        while batch:
+            yield batch
+            batch = list(islice(rows, batch_size))
+
+    def report(self, read):
+        self.stdout.write(f'{read} rows read...')
+
+    def copy_rows(self, rows, batch_size):
+        table = Ingredient._meta.db_table
+        read = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE {STAGING_TABLE} '
+                f'(name varchar(200), measurement_unit varchar(200)) '
+                f'ON COMMIT DROP')
+            for batch in self.batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f'COPY {STAGING_TABLE} (name, measurement_unit) '
+                    f'FROM STDIN WITH (FORMAT csv)', buffer)
+                read += len(batch)
+                self.report(read)
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT DISTINCT name, measurement_unit '
+                f'FROM {STAGING_TABLE} '
+                f'ON CONFLICT (name, measurement_unit) DO NOTHING')
+        return read
+
+    def bulk_create_rows(self, rows, batch_size):
+        read = 0
+        for batch in self.batches(rows, batch_size):
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=name, measurement_unit=measurement_unit)
+                 for name, measurement_unit in batch],
+                ignore_conflicts=True)
+            read += len(batch)
+            self.report(read)
+        return read
@@ -0,0 +1,123 @@
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from recipes.feed import add_authors, inbox_enabled, remove_authors
+from recipes.models import Favorite, Recipe, ShoppingCart, Subscribe
+from rest_framework import serializers
+from rest_framework.response import Response
+from users.models import User
+
+from .conditional import bump_version
+
+BULK_LIMIT = 100
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_LIMIT)
+
+
+class UserRelation:
+    # INSERT ... ON CONFLICT DO NOTHING and DELETE ... RETURNING report
+    # exactly which rows changed, so concurrent requests neither fail on
+    # the unique constraint nor double count. These statements skip model
+    # signals, so the counters and cache versions are updated here.
+
+    def __init__(self, model, target_model, column, counter,
+                 allow_self=True):
+        self.model = model
+        self.target_model = target_model
+        self.column = column
+        self.counter = counter
+        self.allow_self = allow_self
+
+    def change_counters(self, user, ids, delta):
+        if ids:
+            self.target_model.objects.filter(id__in=ids).update(
+                **{self.counter: Greatest(F(self.counter) + delta, 0)})
+            bump_version(f'user:{user.id}')
+
+    def insert(self, user, ids):
+        fields = [field for field in self.model._meta.local_concrete_fields
+                  if not field.primary_key]
+        rows = [[field.get_db_prep_save(field.pre_save(obj, True),
+                                        connection) for field in fields]
+                for obj in (self.model(user=user, **{self.column: pk})
+                            for pk in ids)]
+        row = f'({", ".join(["%s"] * len(fields))})'
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.model._meta.db_table} '
+                f'({", ".join(field.column for field in fields)}) '
+                f'VALUES {", ".join([row] * len(rows))} '
+                f'ON CONFLICT DO NOTHING RETURNING {self.column}',
+                [value for values in rows for value in values])
+            created = {pk for pk, in cursor.fetchall()}
+            self.change_counters(user, created, 1)
+        return created
+
+    def delete(self, user, ids):
+        placeholders = ', '.join(['%s'] * len(ids))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.model._meta.db_table} '
+                f'WHERE user_id = %s AND {self.column} IN ({placeholders}) '
+                f'RETURNING {self.column}',
+                [user.id, *ids])
+            deleted = {pk for pk, in cursor.fetchall()}
+            self.change_counters(user, deleted, -1)
+        return deleted
+
+    def add(self, user, ids):
+        ids = list(dict.fromkeys(ids))
+        targets = set(self.target_model.objects.filter(
+            id__in=ids).values_list('id', flat=True))
+        if not self.allow_self:
+            targets.discard(user.id)
+        created = self.insert(user, targets) if targets else set()
+        return [{'id': pk, 'status': (
+            'created' if pk in created
+            else 'exists' if pk in targets
+            else 'invalid' if pk == user.id and not self.allow_self
+            else 'not_found')} for pk in ids]
+
+    def remove(self, user, ids):
+        ids = list(dict.fromkeys(ids))
+        deleted = self.delete(user, ids)
+        return [{'id': pk, 'status': 'deleted' if pk in deleted
+                 else 'not_found'} for pk in ids]
+
+
+class SubscriptionRelation(UserRelation):
+    @transaction.atomic
+    def insert(self, user, ids):
+        created = super().insert(user, ids)
+        if inbox_enabled():
+            add_authors(user.id, list(created))
+        return created
+
+    @transaction.atomic
+    def delete(self, user, ids):
+        deleted = super().delete(user, ids)
+        if deleted and inbox_enabled():
+            remove_authors(user.id, deleted)
+        return deleted
+
+
+favorite_relation = UserRelation(
+    Favorite, Recipe, 'recipe_id', 'favorites_count')
+shopping_cart_relation = UserRelation(
+    ShoppingCart, Recipe, 'recipe_id', 'in_carts_count')
+subscription_relation = SubscriptionRelation(
+    Subscribe, User, 'author_id', 'subscribers_count', allow_self=False)
+
+
+def bulk_response(request, relation):
+    serializer = BulkIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['ids']
+    if request.method == 'POST':
+        return Response(relation.add(request.user, ids))
+    return Response(relation.remove(request.user, ids))
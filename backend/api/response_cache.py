@@ -0,0 +1,94 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from recipes.models import Recipe
+from rest_framework.response import Response
+
+from .conditional import get_versions
+
+USER_FLAGS = ('is_favorited', 'is_in_shopping_cart')
+USER_FILTERS = ('is_favorited', 'is_in_shopping_cart')
+
+
+def make_key(prefix, request, *scopes, path=None):
+    versions = get_versions(*scopes)
+    params = sorted(
+        (name, sorted(values)) for name, values in request.GET.lists())
+    path = request.path if path is None else path
+    raw = f'{request.get_host()}:{path}:{params}:{versions}'
+    return f'{prefix}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def get_recipes(data):
+    if 'results' in data:
+        return data['results']
+    return [data]
+
+
+def strip_user_flags(data):
+    data = copy.deepcopy(data)
+    for recipe in get_recipes(data):
+        for flag in USER_FLAGS:
+            recipe[flag] = False
+        recipe['author']['is_subscribed'] = False
+    return data
+
+
+def apply_user_flags(data, user):
+    recipes = get_recipes(data)
+    if user.is_anonymous or not recipes:
+        return data
+    flags = {
+        recipe_id: (is_favorited, is_in_shopping_cart, is_subscribed)
+        for recipe_id, is_favorited, is_in_shopping_cart, is_subscribed
+        in Recipe.objects.filter(
+            id__in=[recipe['id'] for recipe in recipes]
+        ).with_user_flags(user).values_list(
+            'id', 'is_favorited', 'is_in_shopping_cart',
+            'author_is_subscribed')}
+    for recipe in recipes:
+        is_favorited, is_in_shopping_cart, is_subscribed = flags.get(
+            recipe['id'], (False, False, False))
+        recipe['is_favorited'] = is_favorited
+        recipe['is_in_shopping_cart'] = is_in_shopping_cart
+        recipe['author']['is_subscribed'] = is_subscribed
+    return data
+
+
+def cached_response(request, key, handler, *args, **kwargs):
+    data = cache.get(key)
+    if data is not None:
+        return Response(apply_user_flags(data, request.user))
+    response = handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        cache.set(key, strip_user_flags(response.data),
+                  settings.RECIPE_CACHE_TIMEOUT)
+    return response
+
+
+class RecipeCacheMixin:
+    def is_cacheable(self, request):
+        return not any(request.query_params.get(name)
+                       for name in USER_FILTERS)
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return super().list(request, *args, **kwargs)
+        key = make_key('recipes:list', request, 'recipes', 'tags',
+                       'ingredients')
+        return cached_response(
+            request, key, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        # The scopes name the resolved recipe, so equivalent URLs such as
+        # /recipes/01/ and /recipes/1/ share one entry.
+        scopes = self.get_cache_scopes()
+        key = make_key('recipes:detail', request, *scopes,
+                       path=':'.join(scopes))
+        return cached_response(
+            request, key, super().retrieve, *args, **kwargs)
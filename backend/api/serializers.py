@@ -1,13 +1,29 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from djoser.serializers import UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                            ShoppingCart, Subscribe, Tag)
+                            RecipeSummary, ShoppingCart, Subscribe, Tag)
 from rest_framework import serializers
 from users.models import User
 
+from .images import RecipeImageField, schedule_variants
+from .relations import subscription_relation
+
+
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is None:
+        return None
+    try:
+        return serializers.IntegerField(min_value=0).run_validation(
+            recipes_limit)
+    except serializers.ValidationError as error:
+        raise serializers.ValidationError({'recipes_limit': error.detail})
+
 
 class RecipeShortLisTSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(variant='card', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time',)
@@ -21,6 +37,8 @@ class CustomUserSerializer(UserSerializer):
         fields = ('id', 'email', 'first_name', 'last_name', 'is_subscribed',)
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         return Subscribe.objects.filter(
             user_id=user.id, author_id=obj.id
@@ -46,17 +64,20 @@ class SubscribeGetSerializer(serializers.ModelSerializer):
         read_only_fields = ['email', 'first_name', 'last_name']
 
     def get_recipes(self, obj):
-        recipes_limit = self.context['request'].GET.get('recipes_limit')
-        if recipes_limit is not None:
-            recipes_limit = int(recipes_limit)
-        recipes = obj.recipes.all()[:recipes_limit]
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            recipes_limit = get_recipes_limit(self.context['request'])
+            recipes = obj.recipes.all()[:recipes_limit]
         serializer = RecipeShortLisTSerializer(recipes, many=True)
         return serializer.data
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         return Subscribe.objects.filter(
             user_id=user.id, author_id=obj.id
@@ -72,9 +93,8 @@ class SubscribeGetSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         author = User.objects.get(id=validated_data.get('id'))
         user = self.context['request'].user
-        if Subscribe.objects.filter(author=author, user=user).exists():
+        if not subscription_relation.insert(user, [author.id]):
             raise serializers.ValidationError("Subscription already added.")
-        Subscribe.objects.create(author=author, user=user)
         return author
 
 
@@ -102,7 +122,7 @@ class IngredientInRecipeGetSerializer(serializers.ModelSerializer):
 
 
 class IngredientInRecipeCreateSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all(),)
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
@@ -110,13 +130,22 @@ class IngredientInRecipeCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount',)
 
 
+class RecipeSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecipeSummary
+        fields = ('ingredients_count', 'total_mass', 'cost',)
+
+
 class RecipeGetSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientInRecipeGetSerializer(many=True, read_only=True)
-    image = Base64ImageField()
+    image = RecipeImageField(read_only=True)
+    image_webp = RecipeImageField(
+        source='image', variant='webp', read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    summary = RecipeSummarySerializer(read_only=True)
 
     class Meta:
         model = Recipe
@@ -128,16 +157,27 @@ class RecipeGetSerializer(serializers.ModelSerializer):
                   'is_in_shopping_cart',
                   'name',
                   'image',
+                  'image_webp',
                   'text',
-                  'cooking_time',)
+                  'cooking_time',
+                  'summary',)
+
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context['request'].user
         return Favorite.objects.filter(
             user_id=user.id, recipe_id=obj.id
         ).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
         return ShoppingCart.objects.filter(
             user_id=user.id, recipe_id=obj.id
@@ -146,7 +186,7 @@ class RecipeGetSerializer(serializers.ModelSerializer):
 
 class RecipeModifySerializer(serializers.ModelSerializer):
     ingredients = IngredientInRecipeCreateSerializer(many=True)
-    image = Base64ImageField(required=False)
+    image = RecipeImageField(required=False)
 
     class Meta:
         model = Recipe
@@ -157,6 +197,21 @@ class RecipeModifySerializer(serializers.ModelSerializer):
                   'text',
                   'cooking_time',)
 
+    def validate_ingredients(self, value):
+        amounts = {}
+        for ingredient_data in value:
+            ingredient_id = ingredient_data['id']
+            amounts[ingredient_id] = (
+                amounts.get(ingredient_id, 0) + ingredient_data['amount'])
+        ingredients = Ingredient.objects.in_bulk(list(amounts))
+        missing = [ingredient_id for ingredient_id in amounts
+                   if ingredient_id not in ingredients]
+        if missing:
+            raise serializers.ValidationError(
+                f"Ingredients not found: {', '.join(map(str, missing))}.")
+        return [{'id': ingredients[ingredient_id], 'amount': amount}
+                for ingredient_id, amount in amounts.items()]
+
     def validate(self, attrs):
         if attrs.get('image') is None:
             if self.instance is None:
@@ -173,6 +228,32 @@ class RecipeModifySerializer(serializers.ModelSerializer):
                 amount=ingredient_data['amount'])
                 for ingredient_data in ingredients_data])
 
+    def update_ingredients(self, ingredients_data, recipe):
+        amounts = {ingredient_data['id'].id: ingredient_data['amount']
+                   for ingredient_data in ingredients_data}
+        existing = {ingredient.ingredient_id: ingredient
+                    for ingredient in recipe.ingredients.all()}
+        removed = [ingredient.id
+                   for ingredient_id, ingredient in existing.items()
+                   if ingredient_id not in amounts]
+        if removed:
+            IngredientInRecipe.objects.filter(id__in=removed).delete()
+        changed = []
+        for ingredient_id, ingredient in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and amount != ingredient.amount:
+                ingredient.amount = amount
+                changed.append(ingredient)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ['amount'])
+        added = [IngredientInRecipe(
+            recipe=recipe, ingredient_id=ingredient_id, amount=amount)
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing]
+        if added:
+            IngredientInRecipe.objects.bulk_create(added)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
@@ -180,14 +261,19 @@ class RecipeModifySerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.bulk_create_ingredients(ingredients_data, recipe)
         recipe.tags.set(tags_data)
+        schedule_variants(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
-        IngredientInRecipe.objects.filter(recipe=instance).delete()
-        self.bulk_create_ingredients(ingredients_data, instance)
-        instance.tags.clear()
+        self.update_ingredients(ingredients_data, instance)
         instance.tags.set(tags_data)
+        image_changed = validated_data['image'] is not instance.image
+        if image_changed:
+            instance.image_processed = False
         super().update(instance=instance, validated_data=validated_data)
+        if image_changed:
+            schedule_variants(instance)
         return instance
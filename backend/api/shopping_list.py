@@ -0,0 +1,140 @@
+import csv
+import hashlib
+import io
+import json
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from recipes.models import IngredientInRecipe
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'OpenSans'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'fonts', 'OpenSans-Regular.ttf')
+FONT_SIZE = 16
+LINE_HEIGHT = 28
+TOP_MARGIN = 100
+BOTTOM_MARGIN = 60
+CHUNK_SIZE = 8192
+CACHE_TIMEOUT = 60 * 60
+
+
+def register_fonts():
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def get_shopping_list(user):
+    return IngredientInRecipe.objects.filter(
+        recipe__shopping_cart__user=user).values(
+            'ingredient__name',
+            'ingredient__measurement_unit').annotate(
+            amount=Sum('amount')).order_by('ingredient__name')
+
+
+def get_cache_key(shopping_list, file_format):
+    digest = hashlib.sha256(
+        json.dumps(shopping_list, ensure_ascii=False).encode()
+    ).hexdigest()
+    return f'shopping_list:{file_format}:{digest}'
+
+
+def format_item(item):
+    return (f"{item['ingredient__name']} - {item['amount']}"
+            f" {item['ingredient__measurement_unit']}")
+
+
+def render_pdf(shopping_list):
+    register_fonts()
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    page_w, page_h = A4
+    p.setFont(FONT_NAME, FONT_SIZE)
+    p.drawString(100, page_h - TOP_MARGIN + 8, "Список покупок:")
+    line_h = page_h - TOP_MARGIN
+    for item in shopping_list:
+        line_h -= LINE_HEIGHT
+        if line_h < BOTTOM_MARGIN:
+            p.showPage()
+            p.setFont(FONT_NAME, FONT_SIZE)
+            line_h = page_h - TOP_MARGIN
+        p.setStrokeColor('black')
+        p.rect(90, line_h - 2, 16, 16, fill=0, stroke=1)
+        p.drawString(120, line_h, format_item(item))
+        p.setStrokeColor('lightgrey')
+        p.line(80, line_h - 8, page_w - 80, line_h - 8)
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def get_pdf(shopping_list):
+    shopping_list = list(shopping_list)
+    key = get_cache_key(shopping_list, 'pdf')
+    content = cache.get(key)
+    if content is None:
+        content = render_pdf(shopping_list)
+        cache.set(key, content, CACHE_TIMEOUT)
+    return content
+
+
+def iter_chunks(content):
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield content[start:start + CHUNK_SIZE]
+
+
+def iter_pdf(shopping_list):
+    return iter_chunks(get_pdf(shopping_list))
+
+
+def iter_csv(shopping_list):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for item in shopping_list.iterator():
+        yield writer.writerow((item['ingredient__name'],
+                               item['amount'],
+                               item['ingredient__measurement_unit']))
+
+
+def iter_txt(shopping_list):
+    yield "Список покупок:\n"
+    for item in shopping_list.iterator():
+        yield format_item(item) + '\n'
+
+
+def iter_json(shopping_list):
+    yield '['
+    for index, item in enumerate(shopping_list.iterator()):
+        yield (',' if index else '') + json.dumps({
+            'name': item['ingredient__name'],
+            'amount': item['amount'],
+            'measurement_unit': item['ingredient__measurement_unit'],
+        }, ensure_ascii=False)
+    yield ']'
+
+
+SHOPPING_LIST_FORMATS = {
+    'pdf': ('application/pdf', iter_pdf),
+    'csv': ('text/csv; charset=utf-8', iter_csv),
+    'txt': ('text/plain; charset=utf-8', iter_txt),
+    'json': ('application/json', iter_json),
+}
+
+
+def shopping_list_response(user, file_format='pdf'):
+    content_type, iter_content = SHOPPING_LIST_FORMATS[file_format]
+    response = StreamingHttpResponse(
+        iter_content(get_shopping_list(user)), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="shopping_cart.{file_format}"')
+    return response
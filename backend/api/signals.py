@@ -0,0 +1,86 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Subscribe, Tag)
+from recipes.summary import summaries_updated
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .authentication import invalidate_tokens
+from .conditional import bump_version
+from .ingredient_index import ingredient_index
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    ingredient_index.invalidate()
+    bump_version('ingredients', 'recipes')
+
+
+@receiver(summaries_updated)
+def invalidate_summaries(recipe_ids, **kwargs):
+    if recipe_ids:
+        bump_version(*(f'recipe:{pk}' for pk in recipe_ids), 'recipes')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(**kwargs):
+    bump_version('tags', 'recipes')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(instance, **kwargs):
+    bump_version(f'recipe:{instance.pk}', 'recipes')
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+def invalidate_recipe_ingredients(instance, **kwargs):
+    bump_version(f'recipe:{instance.recipe_id}', 'recipes')
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_version(f'recipe:{instance.pk}', 'recipes')
+    elif pk_set:
+        bump_version(*(f'recipe:{pk}' for pk in pk_set), 'recipes')
+    else:
+        bump_version('tags', 'recipes')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def invalidate_user_relations(instance, **kwargs):
+    bump_version(f'user:{instance.user_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        bump_version(f'user:{instance.pk}')
+    else:
+        bump_version(f'user:{instance.pk}', 'recipes')
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(instance, **kwargs):
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_tokens(*Token.objects.filter(
+        user=instance).values_list('key', flat=True))
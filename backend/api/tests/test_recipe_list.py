@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Subscribe, Tag)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+@override_settings(CACHES=DUMMY_CACHE)
+class RecipeListQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='x',
+            first_name='Reader', last_name='Reader')
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='x',
+            first_name='Author', last_name='Author')
+        tags = [Tag.objects.create(name=f'tag{i}', color=f'#00000{i}',
+                                   slug=f'tag{i}') for i in range(2)]
+        ingredients = [Ingredient.objects.create(
+            name=f'ingredient{i}', measurement_unit='г') for i in range(3)]
+        for i in range(25):
+            recipe = Recipe.objects.create(
+                author=author, name=f'recipe{i}', text='text',
+                image='recipes/images/recipe.png', cooking_time=5)
+            recipe.tags.set(tags)
+            IngredientInRecipe.objects.bulk_create(
+                [IngredientInRecipe(recipe=recipe, ingredient=ingredient,
+                                    amount=10)
+                 for ingredient in ingredients])
+            if i % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscribe.objects.create(user=cls.user, author=author)
+
+    def count_queries(self, client, limit):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+        return len(context)
+
+    def assert_constant_queries(self, client):
+        self.assertEqual(self.count_queries(client, 3),
+                         self.count_queries(client, 20))
+
+    def test_anonymous_list_queries_do_not_grow_with_page_size(self):
+        self.assert_constant_queries(APIClient())
+        with self.assertNumQueries(5):
+            APIClient().get('/api/recipes/', {'limit': 20})
+
+    def test_authenticated_list_queries_do_not_grow_with_page_size(self):
+        token = Token.objects.create(user=self.user)
+        client = APIClient(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assert_constant_queries(client)
+        with self.assertNumQueries(6):
+            client.get('/api/recipes/', {'limit': 20})
@@ -0,0 +1,60 @@
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from recipes.models import Favorite, Recipe, ShoppingCart
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+THREADS = 8
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ConcurrentToggleTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='x',
+            first_name='Reader', last_name='Reader')
+        self.token = Token.objects.create(user=self.user)
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='recipe', text='text',
+            image='recipes/images/recipe.png', cooking_time=5)
+
+    def post_concurrently(self, url):
+        barrier = threading.Barrier(THREADS)
+        statuses = []
+
+        def post():
+            client = APIClient(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            try:
+                barrier.wait()
+                statuses.append(client.post(url).status_code)
+            except Exception as error:
+                statuses.append(repr(error))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def assert_single_row(self, action, model, counter):
+        statuses = self.post_concurrently(
+            f'/api/recipes/{self.recipe.id}/{action}/')
+        self.assertEqual(statuses.count(201), 1, statuses)
+        self.assertEqual(statuses.count(400), THREADS - 1, statuses)
+        self.recipe.refresh_from_db()
+        rows = model.objects.filter(user=self.user, recipe=self.recipe)
+        self.assertEqual(rows.count(), 1)
+        self.assertEqual(getattr(self.recipe, counter), 1)
+
+    def test_concurrent_favorite_creates_one_row(self):
+        self.assert_single_row('favorite', Favorite, 'favorites_count')
+
+    def test_concurrent_shopping_cart_creates_one_row(self):
+        self.assert_single_row(
+            'shopping_cart', ShoppingCart, 'in_carts_count')
@@ -1,5 +1,5 @@
 from api.views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                       TagViewSet)
+                       StatsView, TagViewSet)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -12,6 +12,7 @@ router_api_v1.register(
 router_api_v1.register(r'^recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
+    path('_stats/', StatsView.as_view(), name='stats'),
     path('', include(router_api_v1.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
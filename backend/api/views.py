@@ -1,28 +1,43 @@
-import io
-
-from django.db.models import Sum
-from django.http import FileResponse
+from django.db.models import F, OuterRef, Prefetch, Subquery, Value
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                            ShoppingCart, Subscribe, Tag)
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from recipes.feed import inbox_enabled
+from recipes.models import Ingredient, Recipe, Tag
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from users.models import User
 
+from .conditional import ConditionalGetMixin
 from .filters import IngredientFilter, RecipeFilter
-from .pagination import FoodgramPagination
+from .ingredient_index import SEARCH_LIMIT, ingredient_index
+from .instrumentation import registry
+from .pagination import FoodgramCursorPagination, FoodgramPagination
 from .permissions import ReadOnly, RecipePermission
+from .relations import (bulk_response, favorite_relation,
+                        shopping_cart_relation, subscription_relation)
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from .response_cache import RecipeCacheMixin
 from .serializers import (CustomUserSerializer, IngredientSerializer,
                           RecipeGetSerializer, RecipeModifySerializer,
                           RecipeShortLisTSerializer, SubscribeGetSerializer,
-                          TagSerializer)
+                          TagSerializer, get_recipes_limit)
+from .shopping_list import shopping_list_response
+
+
+class StatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class CustomUserViewSet(UserViewSet):
@@ -36,8 +51,16 @@ class CustomUserViewSet(UserViewSet):
             permission_classes=[IsAuthenticated])
     def get_subscriptions(self, request):
         user = self.request.user
-        queryset = User.objects.filter(
-            subscribers__user=user).prefetch_related('recipes')
+        recipes_limit = get_recipes_limit(request)
+        recipes = Recipe.objects.all()
+        if recipes_limit is not None:
+            recipes = recipes.filter(id__in=Subquery(
+                Recipe.objects.filter(author=OuterRef('author')).order_by(
+                    '-date_published').values('id')[:recipes_limit]))
+        queryset = User.objects.filter(subscribers__user=user).annotate(
+            is_subscribed=Value(True)
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes'))
         paginator = FoodgramPagination()
         result_page = paginator.paginate_queryset(queryset, request)
         serializer = SubscribeGetSerializer(
@@ -53,6 +76,7 @@ class CustomUserViewSet(UserViewSet):
         author = self.get_object()
         user = self.request.user
         if request.method == 'POST':
+            get_recipes_limit(request)
             serializer = SubscribeGetSerializer(
                 data={'id': kwargs['id']},
                 context={'request': request})
@@ -60,36 +84,159 @@ class CustomUserViewSet(UserViewSet):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         if request.method == 'DELETE':
-            subscription = Subscribe.objects.filter(author=author, user=user)
-            if not subscription.exists():
+            if not subscription_relation.delete(user, [author.id]):
                 return Response(
                     {'error': "Subscription not found."},
                     status=status.HTTP_400_BAD_REQUEST)
-            subscription.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(methods=['post', 'delete'],
+            detail=False,
+            url_path='subscribe',
+            permission_classes=[IsAuthenticated])
+    def bulk_subscribe(self, request):
+        return bulk_response(request, subscription_relation)
+
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [IsAdminUser | ReadOnly]
 
+    def get_version_scopes(self):
+        return ('tags',)
+
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     permission_classes = [IsAdminUser | ReadOnly]
 
+    def get_version_scopes(self):
+        return ('ingredients',)
+
+    def list(self, request, *args, **kwargs):
+        if 'name' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(request, self.search)
+
+    def search(self, request):
+        name = request.query_params['name']
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_LIMIT))
+        except ValueError:
+            return Response(
+                {'limit': "A valid integer is required."},
+                status=status.HTTP_400_BAD_REQUEST)
+        return Response(ingredient_index.search(name, max(limit, 0)))
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(ConditionalGetMixin, RecipeCacheMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeGetSerializer
     pagination_class = FoodgramPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = [RecipePermission]
+    conditional_actions = ('retrieve',)
+    vary_on_user = True
+    orderings = {
+        '-date_published': ('-date_published', '-id'),
+        'date_published': ('date_published', 'id'),
+        '-favorites_count': ('-favorites_count', '-id'),
+        '-in_carts_count': ('-in_carts_count', '-id'),
+    }
+    # CursorPagination keys on the first ordering field only, so it needs a
+    # nearly unique, immutable one. Counters tie and change between pages.
+    cursor_orderings = ('-date_published', 'date_published')
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if (self.action == 'feed'
+                    or self.request.query_params.get('pagination')
+                    == 'cursor'):
+                self._paginator = FoodgramCursorPagination()
+            else:
+                self._paginator = FoodgramPagination()
+        return self._paginator
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'feed'):
+            context['image_variant'] = 'card'
+        return context
+
+    def get_ordering(self):
+        if self.action == 'feed':
+            if inbox_enabled():
+                return ('-feed_date', '-id')
+            return self.orderings['-date_published']
+        params = self.request.query_params
+        cursor = isinstance(self.paginator, FoodgramCursorPagination)
+        search = params.get('search', '').strip()
+        if 'ordering' not in params and search and not cursor:
+            return ('-search_rank', '-date_published', '-id')
+        ordering = params.get('ordering', '-date_published')
+        if ordering not in self.orderings:
+            raise ValidationError(
+                {'ordering': f'Choose one of: {", ".join(self.orderings)}.'})
+        if cursor and ordering not in self.cursor_orderings:
+            raise ValidationError({'pagination': (
+                'Cursor pagination supports only ordering by '
+                f'{" or ".join(self.cursor_orderings)}.')})
+        return self.orderings[ordering]
+
+    def get_cache_scopes(self):
+        # Scopes come from the stored row, so '/recipes/01/' is versioned
+        # as recipe:1 like '/recipes/1/' and non-numeric ids are a 404.
+        if not hasattr(self, '_cache_scopes'):
+            try:
+                recipe_id = int(self.kwargs[self.lookup_field])
+            except ValueError:
+                raise NotFound
+            recipe = Recipe.objects.filter(pk=recipe_id).values(
+                'id', 'author_id').first()
+            if recipe is None:
+                raise NotFound
+            self._cache_scopes = (
+                'tags', 'ingredients', f'recipe:{recipe["id"]}',
+                f'user:{recipe["author_id"]}')
+        return self._cache_scopes
+
+    def get_version_scopes(self):
+        return (*self.get_cache_scopes(), f'user:{self.request.user.id}')
+
+    def get_queryset(self):
+        return Recipe.objects.select_related(
+            'author', 'summary').prefetch_related(
+            'tags', 'ingredients__ingredient'
+        ).defer('search_vector').with_user_flags(self.request.user)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = queryset.order_by(*self.get_ordering())
+        return queryset
+
+    @action(methods=['get'],
+            detail=False,
+            permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        if inbox_enabled():
+            queryset = queryset.filter(
+                feed_entries__user=request.user
+            ).annotate(feed_date=F('feed_entries__date_published'))
+        else:
+            queryset = queryset.filter(author_is_subscribed=True)
+        page = self.paginate_queryset(
+            queryset.order_by(*self.get_ordering()))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     """
     Helper method to create or update a recipe.
@@ -110,7 +257,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         request.serializer.is_valid(raise_exception=True)
         request.serializer.save()
         response_serializer = RecipeGetSerializer(
-            request.serializer.instance,
+            self.get_queryset().get(pk=request.serializer.instance.pk),
             context={'request': request})
         if request.method == 'POST':
             return Response(
@@ -122,6 +269,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def create(self, request):
         return self.create_or_update_recipe(request, None)
 
+    def create_or_delete_relation(self, request, relation):
+        recipe = self.get_object()
+        if request.method == 'POST':
+            if not relation.insert(request.user, [recipe.id]):
+                return Response(
+                    {'error': "Recipe already added."},
+                    status=status.HTTP_400_BAD_REQUEST)
+            serializer = RecipeShortLisTSerializer(recipe)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        if not relation.delete(request.user, [recipe.id]):
+            return Response(
+                {'error': "Recipe not found."},
+                status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         self.check_object_permissions(request, instance)
@@ -132,78 +294,45 @@ class RecipeViewSet(viewsets.ModelViewSet):
             url_path='shopping_cart',
             permission_classes=[IsAuthenticated])
     def create_or_delete_shopping_cart(self, request, *args, **kwargs):
-        recipe = self.get_object()
-        user = self.request.user
-        shopping_cart = ShoppingCart.objects.filter(recipe=recipe, user=user)
-        if request.method == 'POST':
-            if shopping_cart.exists():
-                return Response(
-                    {'error': "Recipe already added."},
-                    status=status.HTTP_400_BAD_REQUEST)
-            ShoppingCart.objects.create(recipe=recipe, user=user)
-            serializer = RecipeShortLisTSerializer(recipe)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        if request.method == 'DELETE':
-            if not shopping_cart.exists():
-                return Response(
-                    {'error': "Recipe not found."},
-                    status=status.HTTP_400_BAD_REQUEST)
-            shopping_cart.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.create_or_delete_relation(request, shopping_cart_relation)
 
-    @action(methods=['get'],
+    @action(methods=['post', 'delete'],
             detail=False,
+            url_path='shopping_cart',
             permission_classes=[IsAuthenticated])
+    def bulk_shopping_cart(self, request):
+        return bulk_response(request, shopping_cart_relation)
+
+    @action(methods=['get'],
+            detail=False,
+            permission_classes=[IsAuthenticated],
+            renderer_classes=[PDFRenderer, CSVRenderer,
+                              PlainTextRenderer, JSONRenderer])
     def download_shopping_cart(self, request):
-        user = request.user
-        shopping_cart = IngredientInRecipe.objects.filter(
-            recipe__shopping_cart__user=user).values(
-                'ingredient__name',
-                'ingredient__measurement_unit').annotate(
-                amount=Sum('amount'))
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer)
-        pdfmetrics.registerFont(TTFont('OpenSans', 'OpenSans-Regular.ttf'))
-        p.setFont('OpenSans', 16)
-        p.drawString(100, 750, "Список покупок:")
-        page_w, page_h = A4
-        line_h = page_h - 100
-        for item in shopping_cart:
-            line_h -= 28
-            p.setStrokeColor('black')
-            p.rect(90, line_h - 2, 16, 16, fill=0, stroke=1)
-            text = (f"{item['ingredient__name']} - {item['amount']}"
-                    f" {item['ingredient__measurement_unit']}")
-            p.drawString(120, line_h, text)
-            p.setStrokeColor('lightgrey')
-            p.line(80, line_h - 8, page_w - 80, line_h - 8)
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-        return FileResponse(buffer,
-                            as_attachment=True,
-                            filename='shopping_cart.pdf')
+        return shopping_list_response(
+            request.user, request.accepted_renderer.format)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if (self.action == 'download_shopping_cart'
+                and not status.is_success(response.status_code)
+                and isinstance(response, Response)):
+            # Errors stay JSON whatever file format was negotiated.
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+        return response
 
     @action(methods=['post', 'delete'],
             detail=True,
             url_path='favorite',
             permission_classes=[IsAuthenticated])
     def create_or_delete_favorite(self, request, *args, **kwargs):
-        recipe = self.get_object()
-        user = self.request.user
-        favorite = Favorite.objects.filter(recipe=recipe, user=user)
-        if request.method == 'POST':
-            if favorite.exists():
-                return Response(
-                    {'error': "Recipe already added."},
-                    status=status.HTTP_400_BAD_REQUEST)
-            Favorite.objects.create(recipe=recipe, user=user)
-            serializer = RecipeShortLisTSerializer(recipe)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        if request.method == 'DELETE':
-            if not favorite.exists():
-                return Response(
-                    {'error': "Recipe not found."},
-                    status=status.HTTP_400_BAD_REQUEST)
-            favorite.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.create_or_delete_relation(request, favorite_relation)
+
+    @action(methods=['post', 'delete'],
+            detail=False,
+            url_path='favorite',
+            permission_classes=[IsAuthenticated])
+    def bulk_favorite(self, request):
+        return bulk_response(request, favorite_relation)
@@ -0,0 +1,93 @@
+"""
+PostgreSQL backend that checks connections out of a psycopg2 pool.
+
+Use it with CONN_MAX_AGE = 0 so Django returns the connection to the
+pool at the end of every request instead of closing it. When all
+MAX_SIZE connections are checked out, a request waits up to TIMEOUT
+seconds for one to be returned.
+"""
+
+import threading
+
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from psycopg2 import pool
+
+_pools = {}
+_lock = threading.Lock()
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    # ThreadedConnectionPool raises PoolError as soon as it is exhausted,
+    # so a semaphore makes callers wait for a free slot instead.
+
+    def __init__(self, minconn, maxconn, *args, timeout=None, **kwargs):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self.timeout = timeout
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                f'No pooled connection became free within '
+                f'{self.timeout} seconds.')
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_pool(self, conn_params):
+        with _lock:
+            if self.alias not in _pools:
+                options = self.settings_dict.get('POOL', {})
+                _pools[self.alias] = BlockingConnectionPool(
+                    options.get('MIN_SIZE', 1),
+                    options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 30),
+                    **conn_params)
+            return _pools[self.alias]
+
+    def checkout(self, conn_params):
+        connection_pool = self.get_pool(conn_params)
+        connection = connection_pool.getconn()
+        if not connection.closed and not self.settings_dict.get(
+                'CONN_HEALTH_CHECKS'):
+            return connection
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+            return connection
+        except psycopg2.Error:
+            connection_pool.putconn(connection, close=True)
+            return connection_pool.getconn()
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        connection = self.checkout(conn_params)
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                _pools[self.alias].putconn(self.connection)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
-from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingCart, Subscribe, Tag)
+from .models import (Favorite, Ingredient, IngredientInRecipe, IngredientPrice,
+                     Recipe, ShoppingCart, Subscribe, Tag)
 
 
 class RecipeAdmin(admin.ModelAdmin):
@@ -10,7 +10,7 @@ class RecipeAdmin(admin.ModelAdmin):
     empty_value_display = '-empty-'
 
     def total_favorites(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
 
 class IngredientAdmin(admin.ModelAdmin):
@@ -22,6 +22,7 @@ class IngredientAdmin(admin.ModelAdmin):
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(IngredientInRecipe)
+admin.site.register(IngredientPrice)
 admin.site.register(Tag)
 admin.site.register(Subscribe)
 admin.site.register(Favorite)
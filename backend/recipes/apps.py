@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     name = 'recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .indexes import create_name_prefix_index
+        from .search import create_search_index
+        post_migrate.connect(create_name_prefix_index, sender=self)
+        post_migrate.connect(create_search_index, sender=self)
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import connection
+
+from .models import FeedEntry, Recipe, Subscribe
+
+
+def inbox_enabled():
+    return settings.FEED_INBOX_ENABLED
+
+
+def fill_inbox(condition='', params=()):
+    """Copy recipes of followed authors into the subscribers' inboxes."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FeedEntry._meta.db_table} '
+            f'(user_id, recipe_id, date_published) '
+            f'SELECT s.user_id, r.id, r.date_published '
+            f'FROM {Subscribe._meta.db_table} s '
+            f'JOIN {Recipe._meta.db_table} r ON r.author_id = s.author_id '
+            f'{condition} ON CONFLICT DO NOTHING',
+            params)
+
+
+def fan_out_recipe(recipe):
+    fill_inbox('WHERE r.id = %s', [recipe.pk])
+
+
+def add_authors(user_id, author_ids):
+    if author_ids:
+        placeholders = ', '.join(['%s'] * len(author_ids))
+        fill_inbox(
+            f'WHERE s.user_id = %s AND s.author_id IN ({placeholders})',
+            [user_id, *author_ids])
+
+
+def remove_authors(user_id, author_ids):
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id__in=author_ids).delete()
+
+
+def rebuild_inbox():
+    FeedEntry.objects.all().delete()
+    fill_inbox()
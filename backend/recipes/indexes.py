@@ -0,0 +1,18 @@
+from django.db import connections
+
+from .models import Ingredient
+
+NAME_PREFIX_INDEX = 'ingredient_upper_name_idx'
+
+
+def create_name_prefix_index(using='default', **kwargs):
+    # name__istartswith compiles to UPPER(name) LIKE 'X%', which a btree
+    # in a non-C collation only serves with text_pattern_ops. Django 3.2
+    # indexes have no opclasses for expressions, so the index is raw SQL.
+    if connections[using].vendor != 'postgresql':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {NAME_PREFIX_INDEX} '
+            f'ON {Ingredient._meta.db_table} '
+            f'(UPPER(name) text_pattern_ops)')
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.feed import rebuild_inbox
+from recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized subscription feeds of all users.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuild_inbox()
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {FeedEntry.objects.count()} feed entries '
+            f'in {time.perf_counter() - started:.2f}s.'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import Favorite, Recipe, ShoppingCart, Subscribe, User
+from recipes.summary import update_summaries
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recalculate denormalized recipe and user counters and summaries.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.update(
+            favorites_count=count_subquery(Favorite, 'recipe'),
+            in_carts_count=count_subquery(ShoppingCart, 'recipe'))
+        users = User.objects.update(
+            recipes_count=count_subquery(Recipe, 'author'),
+            subscribers_count=count_subquery(Subscribe, 'author'))
+        update_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted {recipes} recipes and {users} users.'))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.models import Recipe
+from recipes.search import create_search_index, update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents of all recipes.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        create_search_index()
+        update_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Reindexed {Recipe.objects.count()} recipes '
+            f'in {time.perf_counter() - started:.2f}s.'))
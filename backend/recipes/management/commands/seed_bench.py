@@ -0,0 +1,159 @@
+import io
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+from recipes.feed import inbox_enabled, rebuild_inbox
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Subscribe, Tag)
+from recipes.search import update_search_index
+from users.models import User
+
+USER_PREFIX = 'bench_user_'
+IMAGE_NAME = 'recipes/images/bench.png'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+BATCH_SIZE = 2000
+
+
+def popularity_weights(count, rng):
+    return [rng.paretovariate(1.2) for _ in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic dataset for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--subscriptions', type=int, default=20,
+                            help='Average subscriptions per user.')
+        parser.add_argument('--favorites', type=int, default=30,
+                            help='Average favorites per user.')
+        parser.add_argument('--carts', type=int, default=5,
+                            help='Average shopping cart size per user.')
+        parser.add_argument('--ingredients', type=int, default=8,
+                            help='Average ingredients per recipe.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated data first.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        existing = User.objects.filter(username__startswith=USER_PREFIX)
+        if existing.exists():
+            if not options['clear']:
+                raise CommandError(
+                    'Benchmark data already exists, use --clear to replace.')
+            existing.delete()
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=self.stdout)
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            tags = self.create_tags()
+            recipes = self.create_recipes(
+                users, tags, options['recipes'], options['ingredients'], rng)
+            self.create_relations(users, recipes, options, rng)
+            update_search_index()
+            if inbox_enabled():
+                rebuild_inbox()
+        call_command('recount', stdout=self.stdout)
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(users)} users and {len(recipes)} recipes '
+            f'in {time.perf_counter() - started:.2f}s.'))
+
+    def create_users(self, count):
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=f'{USER_PREFIX}{index}',
+                  email=f'{USER_PREFIX}{index}@example.com',
+                  first_name='Bench',
+                  last_name=f'User {index}',
+                  password=password)
+             for index in range(count)],
+            batch_size=BATCH_SIZE)
+        return list(User.objects.filter(
+            username__startswith=USER_PREFIX).order_by('id'))
+
+    def create_tags(self):
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color})
+        return list(Tag.objects.all())
+
+    def create_image(self):
+        if not default_storage.exists(IMAGE_NAME):
+            buffer = io.BytesIO()
+            Image.new('RGB', (600, 400), '#E26C2D').save(buffer, 'PNG')
+            default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+        return IMAGE_NAME
+
+    def create_recipes(self, users, tags, count, ingredients_count, rng):
+        image = self.create_image()
+        weights = popularity_weights(len(users), rng)
+        authors = rng.choices(users, weights=weights, k=count)
+        Recipe.objects.bulk_create(
+            [Recipe(author=author,
+                    name=f'Bench recipe {index}',
+                    image=image,
+                    text='Synthetic recipe for benchmarks.',
+                    cooking_time=rng.randint(5, 120))
+             for index, author in enumerate(authors)],
+            batch_size=BATCH_SIZE)
+        recipes = list(Recipe.objects.filter(
+            author__username__startswith=USER_PREFIX).order_by('id'))
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        Recipe.tags.through.objects.bulk_create(
+            [Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+             for recipe in recipes
+             for tag in rng.sample(tags, rng.randint(1, len(tags)))],
+            batch_size=BATCH_SIZE)
+        IngredientInRecipe.objects.bulk_create(
+            [IngredientInRecipe(recipe=recipe, ingredient_id=ingredient_id,
+                                amount=rng.randint(1, 500))
+             for recipe in recipes
+             for ingredient_id in rng.sample(
+                 ingredient_ids,
+                 min(len(ingredient_ids),
+                     max(1, int(rng.gauss(ingredients_count, 3)))))],
+            batch_size=BATCH_SIZE)
+        return recipes
+
+    def sample(self, population, weights, average, rng):
+        size = min(len(population), int(rng.expovariate(1 / average)))
+        return set(rng.choices(population, weights=weights, k=size))
+
+    def create_relations(self, users, recipes, options, rng):
+        author_weights = popularity_weights(len(users), rng)
+        recipe_weights = popularity_weights(len(recipes), rng)
+        subscriptions, favorites, carts = [], [], []
+        for user in users:
+            subscriptions.extend(
+                Subscribe(user=user, author=author)
+                for author in self.sample(
+                    users, author_weights, options['subscriptions'], rng)
+                if author != user)
+            favorites.extend(
+                Favorite(user=user, recipe=recipe)
+                for recipe in self.sample(
+                    recipes, recipe_weights, options['favorites'], rng))
+            carts.extend(
+                ShoppingCart(user=user, recipe=recipe)
+                for recipe in self.sample(
+                    recipes, recipe_weights, options['carts'], rng))
+        for model, objects in ((Subscribe, subscriptions),
+                               (Favorite, favorites),
+                               (ShoppingCart, carts)):
+            model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
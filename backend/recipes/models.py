@@ -1,7 +1,9 @@
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 
 User = get_user_model()
 
@@ -33,12 +35,53 @@ class Ingredient(models.Model):
         max_length=200)
 
     class Meta:
-        unique_together = ['name', 'measurement_unit']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient_name_unit'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class IngredientPrice(models.Model):
+    ingredient = models.OneToOneField(
+        Ingredient,
+        verbose_name='Ingredient',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='price')
+    price = models.DecimalField(
+        verbose_name='Price',
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(0)])
+    per_amount = models.PositiveIntegerField(
+        verbose_name='Amount of measurement units the price is for',
+        default=1,
+        validators=[MinValueValidator(1)])
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.price} / {self.per_amount}'
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False))
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            author_is_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('author'))))
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -51,6 +94,10 @@ class Recipe(models.Model):
     image = models.ImageField(
         verbose_name='Recipe image',
         upload_to='recipes/images/')
+    image_processed = models.BooleanField(
+        verbose_name='Image variants generated',
+        default=False,
+        editable=False)
     text = models.TextField(
         verbose_name='Description and instructions for cooking')
     used_ingredients = models.ManyToManyField(
@@ -67,9 +114,31 @@ class Recipe(models.Model):
     date_published = models.DateTimeField(
         verbose_name='Date published',
         auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Times added to favorites',
+        default=0,
+        editable=False)
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='Times added to shopping cart',
+        default=0,
+        editable=False)
+    search_vector = SearchVectorField(
+        verbose_name='Full-text search document',
+        null=True,
+        editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date_published',)
+        indexes = [
+            models.Index(fields=['-date_published', '-id'],
+                         name='recipe_date_published_idx'),
+            models.Index(fields=['-favorites_count', '-id'],
+                         name='recipe_favorites_count_idx'),
+            models.Index(fields=['-in_carts_count', '-id'],
+                         name='recipe_in_carts_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -93,6 +162,36 @@ class IngredientInRecipe(models.Model):
         return f'{self.ingredient.name} - {self.amount}'
 
 
+class RecipeSummary(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Recipe',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary')
+    ingredients_count = models.PositiveSmallIntegerField(
+        verbose_name='Number of ingredients',
+        default=0)
+    total_mass = models.PositiveIntegerField(
+        verbose_name='Total mass in grams of weighed ingredients',
+        default=0)
+    cost = models.DecimalField(
+        verbose_name='Cost, if every ingredient has a price',
+        max_digits=12,
+        decimal_places=2,
+        null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['total_mass'],
+                         name='summary_total_mass_idx'),
+            models.Index(fields=['cost'], name='summary_cost_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} - {self.ingredients_count}'
+
+
 class Subscribe(models.Model):
     user = models.ForeignKey(
         User,
@@ -106,7 +205,10 @@ class Subscribe(models.Model):
         related_name='subscribers')
 
     class Meta:
-        unique_together = ['user', 'author']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_subscription'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.author.username}'
@@ -128,8 +230,11 @@ class Favorite(models.Model):
         auto_now_add=True)
 
     class Meta:
-        unique_together = ['user', 'recipe']
         ordering = ('date_added',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_favorite'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe}'
@@ -151,8 +256,39 @@ class ShoppingCart(models.Model):
         auto_now_add=True)
 
     class Meta:
-        unique_together = ['user', 'recipe']
         ordering = ('date_added',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_shopping_cart'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} - {self.recipe}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Feed owner',
+        on_delete=models.CASCADE,
+        related_name='feed_entries')
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Recipe',
+        on_delete=models.CASCADE,
+        related_name='feed_entries')
+    date_published = models.DateTimeField(
+        verbose_name='Recipe date published')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-date_published', '-recipe'],
+                         name='feed_entry_user_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe}'
@@ -0,0 +1,102 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, connections
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Ingredient, IngredientInRecipe, Recipe
+
+WORD_RE = re.compile(r'\w+')
+SEARCH_INDEX = 'recipe_search_vector_idx'
+SEARCH_TABLE = 'recipes_recipe_search'
+# Name, ingredients and text weights, highest first.
+SQLITE_WEIGHTS = '10.0, 5.0, 1.0'
+
+
+def create_search_index(using='default', **kwargs):
+    table = Recipe._meta.db_table
+    vendor = connections[using].vendor
+    with connections[using].cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} '
+                f'ON {table} USING gin (search_vector)')
+        elif vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+                f'USING fts5(name, ingredients, text, '
+                f"tokenize='unicode61 remove_diacritics 2')")
+
+
+def id_filter(column, ids):
+    if ids is None:
+        return ''
+    return f'WHERE {column} IN ({", ".join(["%s"] * len(ids))})'
+
+
+def ingredient_names(function):
+    return (
+        f"coalesce((SELECT {function}(i.name, ' ') "
+        f'FROM {IngredientInRecipe._meta.db_table} ir '
+        f'JOIN {Ingredient._meta.db_table} i ON i.id = ir.ingredient_id '
+        f"WHERE ir.recipe_id = r.id), '')")
+
+
+def update_search_index(recipe_ids=None):
+    """Rebuild search documents for the given recipes, or for all."""
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+    params = recipe_ids or []
+    table = Recipe._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'UPDATE {table} r SET search_vector = '
+                f"setweight(to_tsvector(%s::regconfig, r.name), 'A') || "
+                f'setweight(to_tsvector(%s::regconfig, '
+                f"{ingredient_names('string_agg')}), 'B') || "
+                f"setweight(to_tsvector(%s::regconfig, r.text), 'C') "
+                f'{id_filter("r.id", recipe_ids)}',
+                [settings.SEARCH_CONFIG] * 3 + params)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} '
+                f'{id_filter("rowid", recipe_ids)}',
+                params)
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} '
+                f'(rowid, name, ingredients, text) '
+                f'SELECT r.id, r.name, '
+                f"{ingredient_names('group_concat')}, r.text "
+                f'FROM {table} r {id_filter("r.id", recipe_ids)}',
+                params)
+
+
+def search_recipes(queryset, value):
+    """Filter recipes by full-text match and annotate search_rank."""
+    words = WORD_RE.findall(value)
+    if not words:
+        return queryset.none().annotate(
+            search_rank=Value(0.0, output_field=FloatField()))
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            ' & '.join(f'{word}:*' for word in words),
+            config=settings.SEARCH_CONFIG,
+            search_type='raw')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query))
+    match = ' '.join(f'"{word}"*' for word in words)
+    table = Recipe._meta.db_table
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        [match],
+    )).annotate(search_rank=RawSQL(
+        f'SELECT -bm25({SEARCH_TABLE}, {SQLITE_WEIGHTS}) '
+        f'FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = {table}.id',
+        [match],
+        output_field=FloatField()))
@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .feed import add_authors, fan_out_recipe, inbox_enabled, remove_authors
+from .models import (Favorite, Ingredient, IngredientInRecipe, IngredientPrice,
+                     Recipe, ShoppingCart, Subscribe, User)
+from .search import update_search_index
+from .summary import update_ingredient_summaries, update_summaries
+
+
+def change_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)})
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def increment_in_carts_count(instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'in_carts_count', 1)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_in_carts_count(instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'in_carts_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def increment_subscribers_count(instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'subscribers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def decrement_subscribers_count(instance, **kwargs):
+    change_counter(User, instance.author_id, 'subscribers_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def reindex_recipe(instance, **kwargs):
+    # Ingredients are written after the recipe itself, so the search
+    # document is rebuilt once the surrounding transaction commits.
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: update_search_index([recipe_id]))
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_recipes(instance, created, **kwargs):
+    if not created:
+        update_search_index(IngredientInRecipe.objects.filter(
+            ingredient=instance).values_list('recipe_id', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_to_subscribers(instance, created, **kwargs):
+    if created and inbox_enabled():
+        fan_out_recipe(instance)
+
+
+@receiver(post_save, sender=Subscribe)
+def add_author_to_inbox(instance, created, **kwargs):
+    if created and inbox_enabled():
+        add_authors(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Subscribe)
+def remove_author_from_inbox(instance, **kwargs):
+    if inbox_enabled():
+        remove_authors(instance.user_id, [instance.author_id])
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+def update_recipe_summary(instance, **kwargs):
+    recipe_id = getattr(instance, 'recipe_id', instance.pk)
+    transaction.on_commit(lambda: update_summaries([recipe_id]))
+
+
+@receiver(post_save, sender=IngredientPrice)
+@receiver(post_delete, sender=IngredientPrice)
+def update_price_summaries(instance, **kwargs):
+    update_ingredient_summaries(instance.ingredient_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_unit_summaries(instance, created, **kwargs):
+    if not created:
+        update_ingredient_summaries(instance.pk)
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (Case, Count, DecimalField, F, IntegerField, Q,
+                              Sum, Value, When)
+from django.dispatch import Signal
+
+from .models import IngredientInRecipe, Recipe, RecipeSummary
+
+# Grams per measurement unit, for the units that measure mass.
+MASS_UNITS = {'г': 1, 'кг': 1000}
+CENTS = Decimal('0.01')
+BATCH_SIZE = 1000
+
+# Sent with the ids of the recipes whose summaries were rewritten.
+summaries_updated = Signal()
+
+
+def summarize(recipe_ids=None):
+    amounts = IngredientInRecipe.objects.all()
+    if recipe_ids is not None:
+        amounts = amounts.filter(recipe_id__in=recipe_ids)
+    return amounts.order_by().values('recipe_id').annotate(
+        ingredients_count=Count('id'),
+        total_mass=Sum(Case(
+            *(When(ingredient__measurement_unit=unit,
+                   then=F('amount') * grams)
+              for unit, grams in MASS_UNITS.items()),
+            default=Value(0),
+            output_field=IntegerField())),
+        cost=Sum(
+            F('amount') * F('ingredient__price__price')
+            / F('ingredient__price__per_amount'),
+            output_field=DecimalField()),
+        unpriced=Count('id', filter=Q(ingredient__price__isnull=True)))
+
+
+@transaction.atomic
+def update_summaries(recipe_ids=None):
+    """Recompute summaries of the given recipes, or of all."""
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        recipes = recipes.filter(id__in=recipe_ids)
+    rows = {row['recipe_id']: row for row in summarize(recipe_ids)}
+    summaries = []
+    for recipe_id in recipes.values_list('id', flat=True):
+        row = rows.get(recipe_id)
+        if row is None:
+            summaries.append(RecipeSummary(recipe_id=recipe_id, cost=0))
+            continue
+        cost = None
+        if not row['unpriced']:
+            cost = Decimal(row['cost']).quantize(CENTS)
+        summaries.append(RecipeSummary(
+            recipe_id=recipe_id,
+            ingredients_count=row['ingredients_count'],
+            total_mass=row['total_mass'],
+            cost=cost))
+    RecipeSummary.objects.filter(recipe_id__in=recipes.values('id')).delete()
+    RecipeSummary.objects.bulk_create(summaries, batch_size=BATCH_SIZE)
+    summaries_updated.send(
+        sender=RecipeSummary,
+        recipe_ids=[summary.recipe_id for summary in summaries])
+
+
+def update_ingredient_summaries(ingredient_id):
+    update_summaries(IngredientInRecipe.objects.filter(
+        ingredient_id=ingredient_id).values_list('recipe_id', flat=True))
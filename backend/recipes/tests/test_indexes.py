@@ -0,0 +1,51 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
+from users.models import User
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL query plans.')
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'ingredient {i}', measurement_unit='г')
+            for i in range(1000))
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='x')
+        Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'recipe {i}', text='text',
+                   image='recipes/images/recipe.png', cooking_time=5)
+            for i in range(1000))
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assert_uses_index(self, queryset, index):
+        self.assertIn(index, queryset.explain())
+
+    def test_ingredient_prefix_search_uses_pattern_index(self):
+        self.assert_uses_index(
+            Ingredient.objects.filter(name__istartswith='ingredient 1'),
+            'ingredient_upper_name_idx')
+
+    def test_recipe_list_orderings_use_indexes(self):
+        for ordering, index in (
+                (('-date_published', '-id'), 'recipe_date_published_idx'),
+                (('-favorites_count', '-id'), 'recipe_favorites_count_idx'),
+                (('-in_carts_count', '-id'), 'recipe_in_carts_count_idx')):
+            with self.subTest(ordering=ordering):
+                self.assert_uses_index(
+                    Recipe.objects.order_by(*ordering)[:6], index)
+
+    def test_unique_relations_use_constraint_indexes(self):
+        user = User.objects.get()
+        for model, index in ((Favorite, 'unique_favorite'),
+                             (ShoppingCart, 'unique_shopping_cart')):
+            with self.subTest(model=model.__name__):
+                self.assert_uses_index(
+                    model.objects.filter(user=user, recipe_id=1), index)
@@ -4,7 +4,8 @@ from .models import User
 
 
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email')
+    list_display = (
+        'username', 'email', 'recipes_count', 'subscribers_count')
     list_filter = ('username', 'email')
     empty_value_display = '-empty-'
 
@@ -17,6 +17,14 @@ class User(AbstractUser):
     last_name = models.CharField(
         verbose_name='Last name',
         max_length=150)
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Number of recipes',
+        default=0,
+        editable=False)
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Number of subscribers',
+        default=0,
+        editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']